@@ -1,10 +1,12 @@
 from datetime import datetime, timedelta
 from typing import Optional
-from jose import JWTError, jwt
+from jose import JWTError, jwk, jwt
 from passlib.context import CryptContext
 from fastapi import Depends, HTTPException, status
+from fastapi.concurrency import run_in_threadpool
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from sqlmodel import Session, select
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
 from app.models import User, TokenData
 from app.database import get_session
 import os
@@ -13,8 +15,18 @@ import os
 SECRET_KEY = os.getenv("SECRET_KEY", "your-secret-key-here-change-in-production")
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
-
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Build the signing key once instead of parsing SECRET_KEY on every token
+JWT_KEY = jwk.construct(SECRET_KEY, ALGORITHM)
+# Tune so a hash takes roughly 250-500 ms on the deployment hardware
+BCRYPT_COST = int(os.getenv("BCRYPT_COST", "12"))
+
+# Hashes below the configured cost are flagged for upgrade on next login
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__rounds=BCRYPT_COST,
+    bcrypt__min_rounds=BCRYPT_COST,
+)
 security = HTTPBearer()
 
 
@@ -33,7 +45,7 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     else:
         expire = datetime.utcnow() + timedelta(minutes=15)
     to_encode.update({"exp": expire})
-    encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
+    encoded_jwt = jwt.encode(to_encode, JWT_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
 
@@ -44,9 +56,7 @@ def verify_token(credentials: HTTPAuthorizationCredentials = Depends(security)):
         headers={"WWW-Authenticate": "Bearer"},
     )
     try:
-        payload = jwt.decode(
-            credentials.credentials, SECRET_KEY, algorithms=[ALGORITHM]
-        )
+        payload = jwt.decode(credentials.credentials, JWT_KEY, algorithms=[ALGORITHM])
         email: str = payload.get("sub")
         if email is None:
             raise credentials_exception
@@ -56,11 +66,13 @@ def verify_token(credentials: HTTPAuthorizationCredentials = Depends(security)):
     return token_data
 
 
-def get_current_user(
+async def get_current_user(
     token_data: TokenData = Depends(verify_token),
-    session: Session = Depends(get_session),
+    session: AsyncSession = Depends(get_session),
 ) -> User:
-    user = session.exec(select(User).where(User.email == token_data.email)).first()
+    user = (
+        await session.exec(select(User).where(User.email == token_data.email))
+    ).first()
     if user is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found"
@@ -68,16 +80,33 @@ def get_current_user(
     return user
 
 
-def get_current_active_user(current_user: User = Depends(get_current_user)) -> User:
+async def get_current_active_user(
+    current_user: User = Depends(get_current_user),
+) -> User:
     if not current_user.is_active:
         raise HTTPException(status_code=400, detail="Inactive user")
     return current_user
 
 
-def authenticate_user(email: str, password: str, session: Session) -> Optional[User]:
-    user = session.exec(select(User).where(User.email == email)).first()
+async def authenticate_user(
+    email: str, password: str, session: AsyncSession
+) -> Optional[User]:
+    user = (await session.exec(select(User).where(User.email == email))).first()
     if not user:
+        # Spend the same hashing time as a wrong password so response timing
+        # does not reveal which emails are registered
+        await run_in_threadpool(pwd_context.dummy_verify)
         return None
-    if not verify_password(password, user.hashed_password):
+    # bcrypt is CPU-bound; run it on the threadpool so it does not stall the
+    # event loop for other requests
+    verified, new_hash = await run_in_threadpool(
+        pwd_context.verify_and_update, password, user.hashed_password
+    )
+    if not verified:
         return None
+    if new_hash:
+        # Re-hash with the current cost now that we have the plain password
+        user.hashed_password = new_hash
+        session.add(user)
+        await session.commit()
     return user
@@ -0,0 +1,71 @@
+from typing import Optional
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+import os
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Responses are cached only when a Redis server is configured
+REDIS_URL = os.getenv("REDIS_URL")
+CACHE_TTL_SECONDS = int(os.getenv("CACHE_TTL_SECONDS", "60"))
+# Keep timeouts short so an unresponsive Redis fails fast into the database
+# fallback instead of stalling requests
+REDIS_TIMEOUT_SECONDS = float(os.getenv("REDIS_TIMEOUT_SECONDS", "0.25"))
+KEY_PREFIX = "ums"
+
+redis: Optional[Redis] = (
+    Redis.from_url(
+        REDIS_URL,
+        socket_connect_timeout=REDIS_TIMEOUT_SECONDS,
+        socket_timeout=REDIS_TIMEOUT_SECONDS,
+    )
+    if REDIS_URL
+    else None
+)
+
+
+def _version_key(namespace: str) -> str:
+    return f"{KEY_PREFIX}:{namespace}:version"
+
+
+async def namespaced_key(namespace: str, key: str) -> Optional[str]:
+    # Keys embed the namespace's current version, so bumping it retires every
+    # earlier entry at once; None means the cache cannot be used right now
+    if redis is None:
+        return None
+    try:
+        version = await redis.get(_version_key(namespace))
+    except RedisError:
+        return None
+    return f"{namespace}:{int(version or 0)}:{key}"
+
+
+async def get_cached(key: Optional[str]) -> Optional[bytes]:
+    if redis is None or key is None:
+        return None
+    try:
+        return await redis.get(f"{KEY_PREFIX}:{key}")
+    except RedisError:
+        # Fall back to the database while Redis is unavailable
+        return None
+
+
+async def set_cached(key: Optional[str], value: bytes) -> None:
+    if redis is None or key is None:
+        return
+    try:
+        await redis.set(f"{KEY_PREFIX}:{key}", value, ex=CACHE_TTL_SECONDS)
+    except RedisError:
+        pass
+
+
+async def clear_cached(namespace: str) -> None:
+    # Invalidate the namespace after a write by moving it to a new version;
+    # the old entries expire after the TTL, as they do if Redis is unreachable
+    if redis is None:
+        return
+    try:
+        await redis.incr(_version_key(namespace))
+    except RedisError:
+        pass
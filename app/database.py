@@ -1,13 +1,116 @@
-from sqlmodel import create_engine, Session
+from typing import AsyncIterator, List, Optional
+from sqlalchemy import event
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.engine import URL, make_url
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlmodel import literal, select, SQLModel
+from sqlmodel.ext.asyncio.session import AsyncSession
 import os
 from dotenv import load_dotenv
 
 load_dotenv()
 
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///university.db")
-engine = create_engine(DATABASE_URL, echo=True)
 
+# Drivers that let the event loop serve other requests during database I/O
+_ASYNC_DRIVERS = {"sqlite": "aiosqlite", "postgresql": "asyncpg", "mysql": "aiomysql"}
 
-def get_session():
-    with Session(engine) as session:
+
+def _async_url(database_url: str) -> URL:
+    url = make_url(database_url)
+    backend = url.get_backend_name()
+    if backend in _ASYNC_DRIVERS:
+        url = url.set(drivername=f"{backend}+{_ASYNC_DRIVERS[backend]}")
+    return url
+
+
+engine = create_async_engine(
+    _async_url(DATABASE_URL),
+    echo=True,
+    pool_size=20,
+    max_overflow=10,
+    pool_timeout=30,
+    pool_pre_ping=True,
+    pool_recycle=3600,
+)
+
+if engine.dialect.name == "sqlite":
+
+    @event.listens_for(engine.sync_engine, "connect")
+    def _set_sqlite_pragmas(dbapi_connection, connection_record):
+        # WAL lets reads proceed while a write is committing; NORMAL skips
+        # the fsync on every commit, which is still safe in WAL mode.
+        # Foreign keys are enforced as on the other databases. A 64 MB page
+        # cache and in-memory temp tables keep sorts and grouped counts off
+        # the disk.
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.execute("PRAGMA foreign_keys=ON")
+        cursor.execute("PRAGMA cache_size=-64000")
+        cursor.execute("PRAGMA temp_store=MEMORY")
+        cursor.close()
+
+
+# Objects stay loaded after commit; inserts fetch server defaults through
+# RETURNING, so there is nothing left to refresh.
+SessionLocal = async_sessionmaker(
+    engine, class_=AsyncSession, autoflush=False, expire_on_commit=False
+)
+
+
+async def get_session() -> AsyncIterator[AsyncSession]:
+    # FastAPI caches the dependency per request, so the auth dependencies and
+    # the endpoint share this session
+    async with SessionLocal() as session:
         yield session
+
+
+async def insert_or_ignore(
+    session: AsyncSession,
+    db_obj: SQLModel,
+    index_elements: List[str],
+    index_where=None,
+    guard=None,
+) -> Optional[SQLModel]:
+    """Insert ``db_obj`` in a single statement, returning the stored row or
+    None if it conflicts with the unique index on ``index_elements`` or the
+    optional SQL ``guard`` condition is false."""
+    model = type(db_obj)
+    values = db_obj.model_dump(exclude_none=True)
+    dialect = session.bind.dialect.name
+
+    if dialect not in ("postgresql", "sqlite"):
+        # No ON CONFLICT support, probe the unique index before inserting
+        conflict = select(model).filter_by(
+            **{name: values[name] for name in index_elements}
+        )
+        if index_where is not None:
+            conflict = conflict.where(index_where)
+        if (await session.exec(conflict)).first():
+            return None
+        if guard is not None and not (await session.exec(select(guard))).one():
+            return None
+        session.add(db_obj)
+        await session.flush()
+        # Load server defaults up front; they cannot be lazy loaded once the
+        # row is handed to the response
+        await session.refresh(db_obj)
+        return db_obj
+
+    insert = postgresql.insert if dialect == "postgresql" else sqlite.insert
+    if guard is None:
+        statement = insert(model).values(**values)
+    else:
+        # INSERT ... SELECT <values> WHERE <guard>
+        columns = model.__table__.c
+        statement = insert(model).from_select(
+            list(values),
+            select(
+                *(literal(value, columns[name].type) for name, value in values.items())
+            ).where(guard),
+        )
+    statement = statement.on_conflict_do_nothing(
+        index_elements=index_elements, index_where=index_where
+    ).returning(model)
+    return (await session.scalars(statement)).one_or_none()
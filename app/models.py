@@ -1,4 +1,5 @@
 from sqlmodel import SQLModel, Field, Relationship
+from sqlalchemy import DateTime, Index, func
 from typing import Optional, List
 from datetime import datetime
 from enum import Enum
@@ -29,6 +30,16 @@ class EnrollmentStatusEnum(str, Enum):
     FAILED = "failed"
 
 
+def _server_timestamp():
+    # Stamped by the database when the row is inserted
+    return Field(
+        default=None,
+        sa_type=DateTime(timezone=True),
+        sa_column_kwargs={"server_default": func.now()},
+        nullable=False,
+    )
+
+
 # Base User Model
 class UserBase(SQLModel):
     email: str = Field(unique=True, index=True)
@@ -42,8 +53,12 @@ class UserBase(SQLModel):
 class User(UserBase, table=True):
     id: Optional[int] = Field(default=None, primary_key=True)
     hashed_password: str
-    created_at: datetime = Field(default_factory=datetime.utcnow)
-    updated_at: Optional[datetime] = Field(default=None)
+    created_at: Optional[datetime] = _server_timestamp()
+    updated_at: Optional[datetime] = Field(
+        default=None,
+        sa_type=DateTime(timezone=True),
+        sa_column_kwargs={"onupdate": func.now()},
+    )
 
 
 class UserCreate(UserBase):
@@ -71,7 +86,7 @@ class StudentBase(SQLModel):
     gender: Optional[GenderEnum] = None
     address: Optional[str] = None
     emergency_contact: Optional[str] = None
-    enrollment_date: datetime = Field(default_factory=datetime.utcnow)
+    enrollment_date: Optional[datetime] = _server_timestamp()
 
 
 class Student(StudentBase, table=True):
@@ -98,10 +113,10 @@ class StudentRead(StudentBase):
 
 # Instructor Model
 class InstructorBase(SQLModel):
-    user_id: int = Field(foreign_key="user.id")
+    user_id: int = Field(foreign_key="user.id", index=True)
     employee_id: str = Field(unique=True, index=True)
     department: str
-    hire_date: datetime = Field(default_factory=datetime.utcnow)
+    hire_date: Optional[datetime] = _server_timestamp()
     salary: Optional[float] = None
     office_location: Optional[str] = None
 
@@ -133,7 +148,7 @@ class CourseBase(SQLModel):
     title: str
     description: Optional[str] = None
     credits: int
-    instructor_id: int = Field(foreign_key="instructor.id")
+    instructor_id: int = Field(foreign_key="instructor.id", index=True)
     max_students: int = Field(default=30)
     status: CourseStatusEnum = Field(default=CourseStatusEnum.ACTIVE)
 
@@ -142,7 +157,7 @@ class Course(CourseBase, table=True):
     id: Optional[int] = Field(default=None, primary_key=True)
     instructor: Optional[Instructor] = Relationship(back_populates="courses")
     enrollments: List["Enrollment"] = Relationship(back_populates="course")
-    created_at: datetime = Field(default_factory=datetime.utcnow)
+    created_at: Optional[datetime] = _server_timestamp()
 
 
 class CourseCreate(CourseBase):
@@ -169,17 +184,34 @@ class CourseRead(CourseBase):
 class EnrollmentBase(SQLModel):
     student_id: int = Field(foreign_key="student.id")
     course_id: int = Field(foreign_key="course.id")
-    enrollment_date: datetime = Field(default_factory=datetime.utcnow)
+    enrollment_date: Optional[datetime] = _server_timestamp()
     status: EnrollmentStatusEnum = Field(default=EnrollmentStatusEnum.ENROLLED)
     grade: Optional[str] = None
 
 
 class Enrollment(EnrollmentBase, table=True):
+    __table_args__ = (
+        Index("ix_enrollment_student_id_course_id", "student_id", "course_id"),
+        Index("ix_enrollment_course_id_status", "course_id", "status"),
+    )
+
     id: Optional[int] = Field(default=None, primary_key=True)
     student: Optional[Student] = Relationship(back_populates="enrollments")
     course: Optional[Course] = Relationship(back_populates="enrollments")
 
 
+# A student can hold only one active enrollment per course; dropped or
+# completed enrollments may repeat. MySQL has no partial indexes.
+Index(
+    "uq_enrollment_active_student_course",
+    Enrollment.student_id,
+    Enrollment.course_id,
+    unique=True,
+    postgresql_where=Enrollment.status == EnrollmentStatusEnum.ENROLLED,
+    sqlite_where=Enrollment.status == EnrollmentStatusEnum.ENROLLED,
+).ddl_if(dialect=("postgresql", "sqlite"))
+
+
 class EnrollmentCreate(SQLModel):
     student_id: int
     course_id: int
@@ -0,0 +1,72 @@
+from functools import lru_cache
+from typing import Any, Dict, FrozenSet, Iterable, Optional, Tuple, Type, get_args
+from fastapi.responses import ORJSONResponse
+from sqlalchemy.orm import joinedload
+from sqlmodel import SQLModel
+
+
+def _read_model(annotation: Any) -> Optional[Type[SQLModel]]:
+    # The read model inside an Optional[...] relationship annotation
+    for arg in get_args(annotation) or (annotation,):
+        if isinstance(arg, type) and issubclass(arg, SQLModel):
+            return arg
+    return None
+
+
+@lru_cache(maxsize=None)
+def _dump_plan(
+    read_model: Type[SQLModel], table_model: Type[SQLModel]
+) -> Tuple[FrozenSet[str], Tuple[Tuple[str, Type[SQLModel]], ...], Dict[str, Any]]:
+    # Split the read model's fields into stored columns, related objects and
+    # computed fields, resolved once per pair
+    columns = table_model.__table__.columns.keys()
+    relationships = table_model.__sqlmodel_relationships__
+    include, nested, defaults = set(), [], {}
+    for name, field in read_model.model_fields.items():
+        if name in columns:
+            include.add(name)
+        elif name in relationships:
+            nested.append((name, _read_model(field.annotation)))
+        else:
+            defaults[name] = field.default
+    return frozenset(include), tuple(nested), defaults
+
+
+@lru_cache(maxsize=None)
+def read_options(table_model: Type[SQLModel], read_model: Type[SQLModel]) -> Tuple:
+    # Loader options that join in every related object the read model
+    # renders, so a query returns rows and their nested objects at once
+    _, nested, _ = _dump_plan(read_model, table_model)
+    options = []
+    for name, nested_model in nested:
+        relationship = getattr(table_model, name)
+        related_options = read_options(
+            relationship.property.mapper.class_, nested_model
+        )
+        options.append(joinedload(relationship).options(*related_options))
+    return tuple(options)
+
+
+def dump_row(row: SQLModel, read_model: Type[SQLModel]) -> Dict[str, Any]:
+    # Dump the row's own values without validating them again
+    include, nested, defaults = _dump_plan(read_model, type(row))
+    data = row.model_dump(include=include)
+    for name, nested_model in nested:
+        value = getattr(row, name)
+        data[name] = None if value is None else dump_row(value, nested_model)
+    data.update(defaults)
+    return data
+
+
+def row_response(
+    row: SQLModel, read_model: Type[SQLModel], **extra: Any
+) -> ORJSONResponse:
+    # Returning a Response directly skips FastAPI's response_model
+    # revalidation; orjson encodes datetimes and enums natively
+    return ORJSONResponse({**dump_row(row, read_model), **extra})
+
+
+def rows_response(
+    rows: Iterable[SQLModel], read_model: Type[SQLModel]
+) -> ORJSONResponse:
+    return ORJSONResponse([dump_row(row, read_model) for row in rows])
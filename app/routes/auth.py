@@ -1,9 +1,10 @@
 from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.concurrency import run_in_threadpool
 from fastapi.security import HTTPBearer
-from sqlmodel import Session, select
+from sqlmodel.ext.asyncio.session import AsyncSession
 from datetime import timedelta
 from app.models import User, UserCreate, UserRead, Token, UserRole
-from app.database import get_session
+from app.database import get_session, insert_or_ignore
 from app.auth import (
     authenticate_user,
     create_access_token,
@@ -11,43 +12,43 @@ from app.auth import (
     get_current_active_user,
     ACCESS_TOKEN_EXPIRE_MINUTES,
 )
+from app.responses import row_response
 
 router = APIRouter()
 
 
 @router.post("/register", response_model=UserRead)
-async def register_user(user_data: UserCreate, session: Session = Depends(get_session)):
-    # Check if user already exists
-    existing_user = session.exec(
-        select(User).where(User.email == user_data.email)
-    ).first()
-    if existing_user:
+async def register_user(
+    user_data: UserCreate, session: AsyncSession = Depends(get_session)
+):
+    # Create new user unless the email is already registered
+    hashed_password = await run_in_threadpool(get_password_hash, user_data.password)
+    db_user = await insert_or_ignore(
+        session,
+        User(
+            email=user_data.email,
+            first_name=user_data.first_name,
+            last_name=user_data.last_name,
+            phone=user_data.phone,
+            role=user_data.role,
+            hashed_password=hashed_password,
+        ),
+        ["email"],
+    )
+    if not db_user:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST, detail="Email already registered"
         )
-
-    # Create new user
-    hashed_password = get_password_hash(user_data.password)
-    db_user = User(
-        email=user_data.email,
-        first_name=user_data.first_name,
-        last_name=user_data.last_name,
-        phone=user_data.phone,
-        role=user_data.role,
-        hashed_password=hashed_password,
-    )
-    session.add(db_user)
-    session.commit()
-    session.refresh(db_user)
+    await session.commit()
 
     return db_user
 
 
 @router.post("/login", response_model=Token)
 async def login_user(
-    email: str, password: str, session: Session = Depends(get_session)
+    email: str, password: str, session: AsyncSession = Depends(get_session)
 ):
-    user = authenticate_user(email, password, session)
+    user = await authenticate_user(email, password, session)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -63,4 +64,4 @@ async def login_user(
 
 @router.get("/me", response_model=UserRead)
 async def read_users_me(current_user: User = Depends(get_current_active_user)):
-    return current_user
+    return row_response(current_user, UserRead)
@@ -1,5 +1,8 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlmodel import Session, select, func
+from fastapi.responses import ORJSONResponse
+from sqlalchemy.orm.attributes import set_committed_value
+from sqlmodel import select, func
+from sqlmodel.ext.asyncio.session import AsyncSession
 from typing import List
 from app.models import (
     Course,
@@ -10,18 +13,46 @@ from app.models import (
     UserRole,
     Enrollment,
     EnrollmentRead,
+    EnrollmentStatusEnum,
     Instructor,
+    InstructorRead,
 )
-from app.database import get_session
+from app.database import get_session, insert_or_ignore
 from app.auth import get_current_active_user
+from app.responses import dump_row, read_options, row_response, rows_response
 
 router = APIRouter()
 
 
+def _select_courses_with_enrolled_count():
+    # Count active enrollments in the same statement as the course rows; a
+    # correlated subquery rather than GROUP BY, so the instructor can be
+    # joined in too
+    enrolled_count = (
+        select(func.count(Enrollment.id))
+        .where(
+            Enrollment.course_id == Course.id,
+            Enrollment.status == EnrollmentStatusEnum.ENROLLED,
+        )
+        .scalar_subquery()
+    )
+    return select(Course, enrolled_count).options(*read_options(Course, CourseRead))
+
+
+def _select_course_with_instructor(course_id: int):
+    # Fetch the course with its instructor in one statement; the instructor
+    # serves both the authorization check and the response
+    return (
+        select(Course)
+        .options(*read_options(Course, CourseRead))
+        .where(Course.id == course_id)
+    )
+
+
 @router.post("/", response_model=CourseRead)
 async def create_course(
     course_data: CourseCreate,
-    session: Session = Depends(get_session),
+    session: AsyncSession = Depends(get_session),
     current_user: User = Depends(get_current_active_user),
 ):
     # Only admins can create courses
@@ -31,28 +62,27 @@ async def create_course(
             detail="Not authorized to create courses",
         )
 
-    # Check if course_code already exists
-    existing_course = session.exec(
-        select(Course).where(Course.course_code == course_data.course_code)
-    ).first()
-    if existing_course:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST, detail="Course code already exists"
-        )
-
     # Check if instructor exists
-    instructor = session.exec(
-        select(Instructor).where(Instructor.id == course_data.instructor_id)
-    ).first()
+    instructor = await session.get(
+        Instructor,
+        course_data.instructor_id,
+        options=read_options(Instructor, InstructorRead),
+    )
     if not instructor:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Instructor not found"
         )
 
-    db_course = Course(**course_data.dict())
-    session.add(db_course)
-    session.commit()
-    session.refresh(db_course)
+    db_course = await insert_or_ignore(
+        session, Course.model_validate(course_data), ["course_code"]
+    )
+    if not db_course:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="Course code already exists"
+        )
+    # The response includes the instructor loaded above
+    set_committed_value(db_course, "instructor", instructor)
+    await session.commit()
 
     return db_course
 
@@ -61,64 +91,61 @@ async def create_course(
 async def get_courses(
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=100),
-    session: Session = Depends(get_session),
+    session: AsyncSession = Depends(get_session),
     current_user: User = Depends(get_current_active_user),
 ):
-    courses = session.exec(select(Course).offset(skip).limit(limit)).all()
-
-    # Add enrolled count for each course
-    for course in courses:
-        enrolled_count = session.exec(
-            select(func.count(Enrollment.id)).where(
-                Enrollment.course_id == course.id, Enrollment.status == "enrolled"
-            )
-        ).one()
-        course.enrolled_count = enrolled_count
+    rows = (
+        await session.exec(
+            _select_courses_with_enrolled_count()
+            .order_by(Course.id)
+            .offset(skip)
+            .limit(limit)
+        )
+    ).all()
 
-    return courses
+    return ORJSONResponse(
+        [
+            {**dump_row(course, CourseRead), "enrolled_count": enrolled_count}
+            for course, enrolled_count in rows
+        ]
+    )
 
 
 @router.get("/{course_id}", response_model=CourseRead)
 async def get_course(
     course_id: int,
-    session: Session = Depends(get_session),
+    session: AsyncSession = Depends(get_session),
     current_user: User = Depends(get_current_active_user),
 ):
-    course = session.exec(select(Course).where(Course.id == course_id)).first()
-    if not course:
+    row = (
+        await session.exec(
+            _select_courses_with_enrolled_count().where(Course.id == course_id)
+        )
+    ).first()
+    if not row:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Course not found"
         )
 
-    # Add enrolled count
-    enrolled_count = session.exec(
-        select(func.count(Enrollment.id)).where(
-            Enrollment.course_id == course.id, Enrollment.status == "enrolled"
-        )
-    ).one()
-    course.enrolled_count = enrolled_count
-
-    return course
+    course, enrolled_count = row
+    return row_response(course, CourseRead, enrolled_count=enrolled_count)
 
 
 @router.put("/{course_id}", response_model=CourseRead)
 async def update_course(
     course_id: int,
     course_update: CourseUpdate,
-    session: Session = Depends(get_session),
+    session: AsyncSession = Depends(get_session),
     current_user: User = Depends(get_current_active_user),
 ):
-    course = session.exec(select(Course).where(Course.id == course_id)).first()
+    course = (await session.exec(_select_course_with_instructor(course_id))).first()
     if not course:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Course not found"
         )
 
     # Check if user is admin or the course instructor
-    instructor = session.exec(
-        select(Instructor).where(Instructor.id == course.instructor_id)
-    ).first()
-
+    instructor = course.instructor
     if current_user.role != UserRole.ADMIN and (
         not instructor or current_user.id != instructor.user_id
     ):
@@ -127,13 +154,26 @@ async def update_course(
             detail="Not authorized to update this course",
         )
 
-    course_data = course_update.dict(exclude_unset=True)
-    for field, value in course_data.items():
-        setattr(course, field, value)
+    # Check if the new instructor exists
+    new_instructor = None
+    if course_update.instructor_id is not None:
+        new_instructor = await session.get(
+            Instructor,
+            course_update.instructor_id,
+            options=read_options(Instructor, InstructorRead),
+        )
+        if not new_instructor:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND, detail="Instructor not found"
+            )
+
+    for field in course_update.model_fields_set:
+        setattr(course, field, getattr(course_update, field))
+    if new_instructor:
+        course.instructor = new_instructor
 
     session.add(course)
-    session.commit()
-    session.refresh(course)
+    await session.commit()
 
     return course
 
@@ -141,7 +181,7 @@ async def update_course(
 @router.delete("/{course_id}")
 async def delete_course(
     course_id: int,
-    session: Session = Depends(get_session),
+    session: AsyncSession = Depends(get_session),
     current_user: User = Depends(get_current_active_user),
 ):
     if current_user.role != UserRole.ADMIN:
@@ -150,14 +190,14 @@ async def delete_course(
             detail="Not authorized to delete courses",
         )
 
-    course = session.exec(select(Course).where(Course.id == course_id)).first()
+    course = await session.get(Course, course_id)
     if not course:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Course not found"
         )
 
-    session.delete(course)
-    session.commit()
+    await session.delete(course)
+    await session.commit()
 
     return {"message": "Course deleted successfully"}
 
@@ -165,30 +205,37 @@ async def delete_course(
 @router.get("/{course_id}/enrollments", response_model=List[EnrollmentRead])
 async def get_course_enrollments(
     course_id: int,
-    session: Session = Depends(get_session),
+    session: AsyncSession = Depends(get_session),
     current_user: User = Depends(get_current_active_user),
 ):
-    course = session.exec(select(Course).where(Course.id == course_id)).first()
-    if not course:
+    # Fetch only the instructor's user id for the authorization check; the
+    # course itself is loaded with the enrollments below
+    row = (
+        await session.exec(
+            select(Course.id, Instructor.user_id)
+            .outerjoin(Instructor, Instructor.id == Course.instructor_id)
+            .where(Course.id == course_id)
+        )
+    ).first()
+    if not row:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Course not found"
         )
 
     # Check if user is admin or the course instructor
-    instructor = session.exec(
-        select(Instructor).where(Instructor.id == course.instructor_id)
-    ).first()
-
-    if current_user.role != UserRole.ADMIN and (
-        not instructor or current_user.id != instructor.user_id
-    ):
+    _, instructor_user_id = row
+    if current_user.role != UserRole.ADMIN and current_user.id != instructor_user_id:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Not authorized to view course enrollments",
         )
 
-    enrollments = session.exec(
-        select(Enrollment).where(Enrollment.course_id == course_id)
+    enrollments = (
+        await session.exec(
+            select(Enrollment)
+            .options(*read_options(Enrollment, EnrollmentRead))
+            .where(Enrollment.course_id == course_id)
+        )
     ).all()
 
-    return enrollments
+    return rows_response(enrollments, EnrollmentRead)
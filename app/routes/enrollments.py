@@ -1,5 +1,8 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlmodel import Session, select, func
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm.attributes import set_committed_value
+from sqlmodel import select, func, literal, or_
+from sqlmodel.ext.asyncio.session import AsyncSession
 from typing import List
 from app.models import (
     Enrollment,
@@ -11,42 +14,56 @@ from app.models import (
     Student,
     Course,
     Instructor,
+    InstructorRead,
+    StudentRead,
     EnrollmentStatusEnum,
 )
-from app.database import get_session
+from app.database import get_session, insert_or_ignore
 from app.auth import get_current_active_user
+from app.responses import read_options, row_response, rows_response
 
 router = APIRouter()
 
 
+def _select_enrollment(enrollment_id: int):
+    # Fetch the enrollment with its student, course and instructor in one
+    # statement; they serve both the authorization check and the response
+    return (
+        select(Enrollment)
+        .options(*read_options(Enrollment, EnrollmentRead))
+        .where(Enrollment.id == enrollment_id)
+    )
+
+
 @router.post("/", response_model=EnrollmentRead)
 async def create_enrollment(
     enrollment_data: EnrollmentCreate,
-    session: Session = Depends(get_session),
+    session: AsyncSession = Depends(get_session),
     current_user: User = Depends(get_current_active_user),
 ):
     # Check if student exists
-    student = session.exec(
-        select(Student).where(Student.id == enrollment_data.student_id)
-    ).first()
+    student = await session.get(
+        Student, enrollment_data.student_id, options=read_options(Student, StudentRead)
+    )
     if not student:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Student not found"
         )
 
-    # Check if course exists
-    course = session.exec(
-        select(Course).where(Course.id == enrollment_data.course_id)
-    ).first()
+    # Check if course exists, locking it so concurrent enrollments cannot
+    # overfill it
+    course = await session.get(Course, enrollment_data.course_id, with_for_update=True)
     if not course:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Course not found"
         )
 
     # Check authorization - admin, student themselves, or course instructor
-    instructor = session.exec(
-        select(Instructor).where(Instructor.id == course.instructor_id)
-    ).first()
+    instructor = await session.get(
+        Instructor,
+        course.instructor_id,
+        options=read_options(Instructor, InstructorRead),
+    )
 
     if (
         current_user.role != UserRole.ADMIN
@@ -58,37 +75,48 @@ async def create_enrollment(
             detail="Not authorized to create enrollment",
         )
 
-    # Check if student is already enrolled in this course
-    existing_enrollment = session.exec(
-        select(Enrollment).where(
-            Enrollment.student_id == enrollment_data.student_id,
-            Enrollment.course_id == enrollment_data.course_id,
-            Enrollment.status == EnrollmentStatusEnum.ENROLLED,
-        )
-    ).first()
-    if existing_enrollment:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Student is already enrolled in this course",
-        )
-
-    # Check if course has available spots
-    enrolled_count = session.exec(
-        select(func.count(Enrollment.id)).where(
-            Enrollment.course_id == enrollment_data.course_id,
-            Enrollment.status == EnrollmentStatusEnum.ENROLLED,
-        )
-    ).one()
+    # Inline the status so the partial unique index can be inferred
+    active = Enrollment.status == literal(
+        EnrollmentStatusEnum.ENROLLED, Enrollment.status.type, literal_execute=True
+    )
+    enrolled_count = (
+        select(func.count(Enrollment.id))
+        .where(Enrollment.course_id == course.id, active)
+        .scalar_subquery()
+    )
 
-    if enrolled_count >= course.max_students:
+    # Insert only if the student is not already enrolled in this course and
+    # the course has available spots
+    db_enrollment = await insert_or_ignore(
+        session,
+        Enrollment.model_validate(enrollment_data),
+        ["student_id", "course_id"],
+        index_where=active,
+        guard=enrolled_count < course.max_students,
+    )
+    if not db_enrollment:
+        existing_enrollment = (
+            await session.exec(
+                select(Enrollment.id).where(
+                    Enrollment.student_id == enrollment_data.student_id,
+                    Enrollment.course_id == enrollment_data.course_id,
+                    active,
+                )
+            )
+        ).first()
         raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST, detail="Course is full"
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=(
+                "Student is already enrolled in this course"
+                if existing_enrollment
+                else "Course is full"
+            ),
         )
-
-    db_enrollment = Enrollment(**enrollment_data.dict())
-    session.add(db_enrollment)
-    session.commit()
-    session.refresh(db_enrollment)
+    # The response includes the student, course and instructor loaded above
+    set_committed_value(course, "instructor", instructor)
+    set_committed_value(db_enrollment, "student", student)
+    set_committed_value(db_enrollment, "course", course)
+    await session.commit()
 
     return db_enrollment
 
@@ -99,74 +127,50 @@ async def get_enrollments(
     limit: int = Query(100, ge=1, le=100),
     student_id: int = Query(None),
     course_id: int = Query(None),
-    session: Session = Depends(get_session),
+    session: AsyncSession = Depends(get_session),
     current_user: User = Depends(get_current_active_user),
 ):
-    query = select(Enrollment)
+    query = select(Enrollment).options(*read_options(Enrollment, EnrollmentRead))
 
     if student_id:
         query = query.where(Enrollment.student_id == student_id)
     if course_id:
         query = query.where(Enrollment.course_id == course_id)
 
-    enrollments = session.exec(query.offset(skip).limit(limit)).all()
-
-    # Filter based on user permissions
-    filtered_enrollments = []
-    for enrollment in enrollments:
-        student = session.exec(
-            select(Student).where(Student.id == enrollment.student_id)
-        ).first()
-        course = session.exec(
-            select(Course).where(Course.id == enrollment.course_id)
-        ).first()
-        instructor = (
-            session.exec(
-                select(Instructor).where(Instructor.id == course.instructor_id)
-            ).first()
-            if course
-            else None
+    # Filter based on user permissions before paginating
+    if current_user.role != UserRole.ADMIN:
+        query = (
+            query.outerjoin(Student, Student.id == Enrollment.student_id)
+            .outerjoin(Course, Course.id == Enrollment.course_id)
+            .outerjoin(Instructor, Instructor.id == Course.instructor_id)
+            .where(
+                or_(
+                    Student.user_id == current_user.id,
+                    Instructor.user_id == current_user.id,
+                )
+            )
         )
 
-        # Check if user can see this enrollment
-        if (
-            current_user.role == UserRole.ADMIN
-            or (student and current_user.id == student.user_id)
-            or (instructor and current_user.id == instructor.user_id)
-        ):
-            filtered_enrollments.append(enrollment)
+    enrollments = (await session.exec(query.offset(skip).limit(limit))).all()
 
-    return filtered_enrollments
+    return rows_response(enrollments, EnrollmentRead)
 
 
 @router.get("/{enrollment_id}", response_model=EnrollmentRead)
 async def get_enrollment(
     enrollment_id: int,
-    session: Session = Depends(get_session),
+    session: AsyncSession = Depends(get_session),
     current_user: User = Depends(get_current_active_user),
 ):
-    enrollment = session.exec(
-        select(Enrollment).where(Enrollment.id == enrollment_id)
-    ).first()
+    enrollment = (await session.exec(_select_enrollment(enrollment_id))).first()
     if not enrollment:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Enrollment not found"
         )
 
     # Check authorization
-    student = session.exec(
-        select(Student).where(Student.id == enrollment.student_id)
-    ).first()
-    course = session.exec(
-        select(Course).where(Course.id == enrollment.course_id)
-    ).first()
-    instructor = (
-        session.exec(
-            select(Instructor).where(Instructor.id == course.instructor_id)
-        ).first()
-        if course
-        else None
-    )
+    student = enrollment.student
+    instructor = enrollment.course.instructor if enrollment.course else None
 
     if (
         current_user.role != UserRole.ADMIN
@@ -178,38 +182,25 @@ async def get_enrollment(
             detail="Not authorized to view this enrollment",
         )
 
-    return enrollment
+    return row_response(enrollment, EnrollmentRead)
 
 
 @router.put("/{enrollment_id}", response_model=EnrollmentRead)
 async def update_enrollment(
     enrollment_id: int,
     enrollment_update: EnrollmentUpdate,
-    session: Session = Depends(get_session),
+    session: AsyncSession = Depends(get_session),
     current_user: User = Depends(get_current_active_user),
 ):
-    enrollment = session.exec(
-        select(Enrollment).where(Enrollment.id == enrollment_id)
-    ).first()
+    enrollment = (await session.exec(_select_enrollment(enrollment_id))).first()
     if not enrollment:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Enrollment not found"
         )
 
     # Check authorization - admin, student (for dropping), or instructor (for grading)
-    student = session.exec(
-        select(Student).where(Student.id == enrollment.student_id)
-    ).first()
-    course = session.exec(
-        select(Course).where(Course.id == enrollment.course_id)
-    ).first()
-    instructor = (
-        session.exec(
-            select(Instructor).where(Instructor.id == course.instructor_id)
-        ).first()
-        if course
-        else None
-    )
+    student = enrollment.student
+    instructor = enrollment.course.instructor if enrollment.course else None
 
     is_authorized = False
     if current_user.role == UserRole.ADMIN:
@@ -234,13 +225,20 @@ async def update_enrollment(
             detail="Not authorized to update this enrollment",
         )
 
-    enrollment_data = enrollment_update.dict(exclude_unset=True)
-    for field, value in enrollment_data.items():
-        setattr(enrollment, field, value)
+    for field in enrollment_update.model_fields_set:
+        setattr(enrollment, field, getattr(enrollment_update, field))
 
     session.add(enrollment)
-    session.commit()
-    session.refresh(enrollment)
+    try:
+        await session.commit()
+    except IntegrityError:
+        # Re-enrolling clashes with the student's active enrollment in the
+        # course on the partial unique index
+        await session.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Student is already enrolled in this course",
+        )
 
     return enrollment
 
@@ -248,7 +246,7 @@ async def update_enrollment(
 @router.delete("/{enrollment_id}")
 async def delete_enrollment(
     enrollment_id: int,
-    session: Session = Depends(get_session),
+    session: AsyncSession = Depends(get_session),
     current_user: User = Depends(get_current_active_user),
 ):
     if current_user.role != UserRole.ADMIN:
@@ -257,15 +255,13 @@ async def delete_enrollment(
             detail="Not authorized to delete enrollments",
         )
 
-    enrollment = session.exec(
-        select(Enrollment).where(Enrollment.id == enrollment_id)
-    ).first()
+    enrollment = await session.get(Enrollment, enrollment_id)
     if not enrollment:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Enrollment not found"
         )
 
-    session.delete(enrollment)
-    session.commit()
+    await session.delete(enrollment)
+    await session.commit()
 
     return {"message": "Enrollment deleted successfully"}
@@ -1,5 +1,7 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlmodel import Session, select
+from sqlalchemy.orm.attributes import set_committed_value
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
 from typing import List
 from app.models import (
     Instructor,
@@ -11,8 +13,9 @@ from app.models import (
     Course,
     CourseRead,
 )
-from app.database import get_session
+from app.database import get_session, insert_or_ignore
 from app.auth import get_current_active_user
+from app.responses import read_options, row_response, rows_response
 
 router = APIRouter()
 
@@ -20,7 +23,7 @@ router = APIRouter()
 @router.post("/", response_model=InstructorRead)
 async def create_instructor(
     instructor_data: InstructorCreate,
-    session: Session = Depends(get_session),
+    session: AsyncSession = Depends(get_session),
     current_user: User = Depends(get_current_active_user),
 ):
     # Only admins can create instructors
@@ -30,17 +33,8 @@ async def create_instructor(
             detail="Not authorized to create instructor profile",
         )
 
-    # Check if employee_id already exists
-    existing_instructor = session.exec(
-        select(Instructor).where(Instructor.employee_id == instructor_data.employee_id)
-    ).first()
-    if existing_instructor:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST, detail="Employee ID already exists"
-        )
-
     # Check if user exists and has instructor role
-    user = session.exec(select(User).where(User.id == instructor_data.user_id)).first()
+    user = await session.get(User, instructor_data.user_id)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="User not found"
@@ -51,10 +45,16 @@ async def create_instructor(
             detail="User must have instructor role",
         )
 
-    db_instructor = Instructor(**instructor_data.dict())
-    session.add(db_instructor)
-    session.commit()
-    session.refresh(db_instructor)
+    db_instructor = await insert_or_ignore(
+        session, Instructor.model_validate(instructor_data), ["employee_id"]
+    )
+    if not db_instructor:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="Employee ID already exists"
+        )
+    # The response includes the user loaded above
+    set_committed_value(db_instructor, "user", user)
+    await session.commit()
 
     return db_instructor
 
@@ -63,40 +63,47 @@ async def create_instructor(
 async def get_instructors(
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=100),
-    session: Session = Depends(get_session),
+    session: AsyncSession = Depends(get_session),
     current_user: User = Depends(get_current_active_user),
 ):
-    instructors = session.exec(select(Instructor).offset(skip).limit(limit)).all()
-    return instructors
+    instructors = (
+        await session.exec(
+            select(Instructor)
+            .options(*read_options(Instructor, InstructorRead))
+            .offset(skip)
+            .limit(limit)
+        )
+    ).all()
+    return rows_response(instructors, InstructorRead)
 
 
 @router.get("/{instructor_id}", response_model=InstructorRead)
 async def get_instructor(
     instructor_id: int,
-    session: Session = Depends(get_session),
+    session: AsyncSession = Depends(get_session),
     current_user: User = Depends(get_current_active_user),
 ):
-    instructor = session.exec(
-        select(Instructor).where(Instructor.id == instructor_id)
-    ).first()
+    instructor = await session.get(
+        Instructor, instructor_id, options=read_options(Instructor, InstructorRead)
+    )
     if not instructor:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Instructor not found"
         )
 
-    return instructor
+    return row_response(instructor, InstructorRead)
 
 
 @router.put("/{instructor_id}", response_model=InstructorRead)
 async def update_instructor(
     instructor_id: int,
     instructor_update: InstructorUpdate,
-    session: Session = Depends(get_session),
+    session: AsyncSession = Depends(get_session),
     current_user: User = Depends(get_current_active_user),
 ):
-    instructor = session.exec(
-        select(Instructor).where(Instructor.id == instructor_id)
-    ).first()
+    instructor = await session.get(
+        Instructor, instructor_id, options=read_options(Instructor, InstructorRead)
+    )
     if not instructor:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Instructor not found"
@@ -109,13 +116,11 @@ async def update_instructor(
             detail="Not authorized to update this instructor",
         )
 
-    instructor_data = instructor_update.dict(exclude_unset=True)
-    for field, value in instructor_data.items():
-        setattr(instructor, field, value)
+    for field in instructor_update.model_fields_set:
+        setattr(instructor, field, getattr(instructor_update, field))
 
     session.add(instructor)
-    session.commit()
-    session.refresh(instructor)
+    await session.commit()
 
     return instructor
 
@@ -123,7 +128,7 @@ async def update_instructor(
 @router.delete("/{instructor_id}")
 async def delete_instructor(
     instructor_id: int,
-    session: Session = Depends(get_session),
+    session: AsyncSession = Depends(get_session),
     current_user: User = Depends(get_current_active_user),
 ):
     if current_user.role != UserRole.ADMIN:
@@ -132,16 +137,14 @@ async def delete_instructor(
             detail="Not authorized to delete instructors",
         )
 
-    instructor = session.exec(
-        select(Instructor).where(Instructor.id == instructor_id)
-    ).first()
+    instructor = await session.get(Instructor, instructor_id)
     if not instructor:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Instructor not found"
         )
 
-    session.delete(instructor)
-    session.commit()
+    await session.delete(instructor)
+    await session.commit()
 
     return {"message": "Instructor deleted successfully"}
 
@@ -149,19 +152,21 @@ async def delete_instructor(
 @router.get("/{instructor_id}/courses", response_model=List[CourseRead])
 async def get_instructor_courses(
     instructor_id: int,
-    session: Session = Depends(get_session),
+    session: AsyncSession = Depends(get_session),
     current_user: User = Depends(get_current_active_user),
 ):
-    instructor = session.exec(
-        select(Instructor).where(Instructor.id == instructor_id)
-    ).first()
+    instructor = await session.get(Instructor, instructor_id)
     if not instructor:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Instructor not found"
         )
 
-    courses = session.exec(
-        select(Course).where(Course.instructor_id == instructor_id)
+    courses = (
+        await session.exec(
+            select(Course)
+            .options(*read_options(Course, CourseRead))
+            .where(Course.instructor_id == instructor_id)
+        )
     ).all()
 
-    return courses
+    return rows_response(courses, CourseRead)
@@ -1,6 +1,10 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlmodel import Session, select
-from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Response, status, Query
+from sqlalchemy import Row, bindparam
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm.attributes import set_committed_value
+from sqlmodel import delete, exists, select, update
+from sqlmodel.ext.asyncio.session import AsyncSession
+from typing import FrozenSet, List, Optional
 from app.models import (
     Student,
     StudentCreate,
@@ -11,16 +15,117 @@ from app.models import (
     Enrollment,
     EnrollmentRead,
 )
-from app.database import get_session
+from app.database import get_session, insert_or_ignore
 from app.auth import get_current_active_user
+from app.cache import clear_cached, get_cached, namespaced_key, set_cached
+from app.responses import read_options, rows_response
 
 router = APIRouter()
 
+# Roles allowed to view any student's records
+_STAFF_ROLES = frozenset({UserRole.ADMIN, UserRole.INSTRUCTOR})
+# Roles allowed to update any student's records
+_ADMIN_ONLY = frozenset({UserRole.ADMIN})
+
+# Built once with bound parameters; the statement memoizes its cache key, so
+# each request only binds values to the already compiled SQL
+_SELECT_STUDENTS_PAGE = (
+    select(Student)
+    .options(*read_options(Student, StudentRead))
+    .offset(bindparam("skip"))
+    .limit(bindparam("limit"))
+)
+_SELECT_STUDENT = (
+    select(Student)
+    .options(*read_options(Student, StudentRead))
+    .where(Student.id == bindparam("student_id"))
+)
+# Students may only read their own row, so the ownership check is part of
+# the lookup
+_SELECT_OWN_STUDENT = _SELECT_STUDENT.where(Student.user_id == bindparam("user_id"))
+_STUDENT_EXISTS = select(exists().where(Student.id == bindparam("student_id")))
+# Only the owner's user id is needed when the student itself is not returned
+_SELECT_STUDENT_OWNER = select(Student.id, Student.user_id).where(
+    Student.id == bindparam("student_id")
+)
+
+
+async def _get_authorized_student(
+    session: AsyncSession,
+    current_user: User,
+    student_id: int,
+    roles: FrozenSet[UserRole],
+    detail: str,
+) -> Student:
+    # Users with one of the roles can access any student
+    if current_user.role in roles:
+        student = await session.get(
+            Student, student_id, options=read_options(Student, StudentRead)
+        )
+        if not student:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND, detail="Student not found"
+            )
+        return student
+
+    student = (
+        await session.exec(
+            _SELECT_OWN_STUDENT,
+            params={"student_id": student_id, "user_id": current_user.id},
+        )
+    ).first()
+    if not student:
+        # Tell a missing student apart from someone else's
+        if not (
+            await session.exec(_STUDENT_EXISTS, params={"student_id": student_id})
+        ).one():
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND, detail="Student not found"
+            )
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail=detail)
+    return student
+
+
+async def _get_authorized_student_owner(
+    session: AsyncSession,
+    current_user: User,
+    student_id: int,
+    roles: FrozenSet[UserRole],
+    detail: str,
+) -> Row:
+    student = (
+        await session.exec(_SELECT_STUDENT_OWNER, params={"student_id": student_id})
+    ).first()
+    if not student:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Student not found"
+        )
+    if current_user.role not in roles and current_user.id != student.user_id:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail=detail)
+    return student
+
+
+def authorized_student(
+    detail: str, roles: FrozenSet[UserRole] = _STAFF_ROLES, narrow: bool = False
+):
+    # Dependency that loads the student in the path for its owner or for
+    # users with one of the roles; narrow lookups fetch only its id and owner
+    load = _get_authorized_student_owner if narrow else _get_authorized_student
+
+    async def dependency(
+        student_id: int,
+        session: AsyncSession = Depends(get_session),
+        current_user: User = Depends(get_current_active_user),
+    ):
+        return await load(session, current_user, student_id, roles, detail)
+
+    return dependency
+
 
 @router.post("/", response_model=StudentRead)
 async def create_student(
     student_data: StudentCreate,
-    session: Session = Depends(get_session),
+    session: AsyncSession = Depends(get_session),
     current_user: User = Depends(get_current_active_user),
 ):
     # Check if user is admin or the user creating their own student profile
@@ -30,17 +135,8 @@ async def create_student(
             detail="Not authorized to create student profile",
         )
 
-    # Check if student_id already exists
-    existing_student = session.exec(
-        select(Student).where(Student.student_id == student_data.student_id)
-    ).first()
-    if existing_student:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST, detail="Student ID already exists"
-        )
-
     # Check if user exists and has student role
-    user = session.exec(select(User).where(User.id == student_data.user_id)).first()
+    user = await session.get(User, student_data.user_id)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="User not found"
@@ -51,10 +147,17 @@ async def create_student(
             detail="User must have student role",
         )
 
-    db_student = Student(**student_data.dict())
-    session.add(db_student)
-    session.commit()
-    session.refresh(db_student)
+    db_student = await insert_or_ignore(
+        session, Student.model_validate(student_data), ["student_id"]
+    )
+    if not db_student:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="Student ID already exists"
+        )
+    # The response includes the user loaded above
+    set_committed_value(db_student, "user", user)
+    await session.commit()
+    await clear_cached("students")
 
     return db_student
 
@@ -63,41 +166,38 @@ async def create_student(
 async def get_students(
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=100),
-    session: Session = Depends(get_session),
+    session: AsyncSession = Depends(get_session),
     current_user: User = Depends(get_current_active_user),
 ):
-    if current_user.role not in [UserRole.ADMIN, UserRole.INSTRUCTOR]:
+    if current_user.role not in _STAFF_ROLES:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Not authorized to view all students",
         )
 
-    students = session.exec(select(Student).offset(skip).limit(limit)).all()
-    return students
+    # Rosters change rarely, so serve the encoded page from the cache when
+    # possible; student writes clear it
+    cache_key = await namespaced_key(
+        "students", f"{skip}:{limit}:{current_user.role.value}"
+    )
+    cached = await get_cached(cache_key)
+    if cached is not None:
+        return Response(content=cached, media_type="application/json")
+
+    students = (
+        await session.exec(_SELECT_STUDENTS_PAGE, params={"skip": skip, "limit": limit})
+    ).all()
+    response = rows_response(students, StudentRead)
+    await set_cached(cache_key, response.body)
+    return response
 
 
 @router.get("/{student_id}", response_model=StudentRead)
 async def get_student(
-    student_id: int,
-    session: Session = Depends(get_session),
-    current_user: User = Depends(get_current_active_user),
+    student: Student = Depends(
+        authorized_student("Not authorized to view this student")
+    ),
 ):
-    student = session.exec(select(Student).where(Student.id == student_id)).first()
-    if not student:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND, detail="Student not found"
-        )
-
-    # Check if user is admin, instructor, or the student themselves
-    if (
-        current_user.role not in [UserRole.ADMIN, UserRole.INSTRUCTOR]
-        and current_user.id != student.user_id
-    ):
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Not authorized to view this student",
-        )
-
     return student
 
 
@@ -105,29 +205,42 @@ async def get_student(
 async def update_student(
     student_id: int,
     student_update: StudentUpdate,
-    session: Session = Depends(get_session),
+    session: AsyncSession = Depends(get_session),
     current_user: User = Depends(get_current_active_user),
 ):
-    student = session.exec(select(Student).where(Student.id == student_id)).first()
-    if not student:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND, detail="Student not found"
-        )
+    student_data = student_update.model_dump(exclude_unset=True)
+    if student_data and session.bind.dialect.update_returning:
+        # Authorize, update and fetch the student in a single statement
+        statement = update(Student).where(Student.id == student_id)
+        if current_user.role != UserRole.ADMIN:
+            statement = statement.where(Student.user_id == current_user.id)
+        student = (
+            await session.scalars(statement.values(**student_data).returning(Student))
+        ).first()
+        if student:
+            # The response includes the user, which RETURNING does not load;
+            # for the student themselves it is the already loaded current user
+            user = await session.get(User, student.user_id)
+            set_committed_value(student, "user", user)
+            await session.commit()
+            await clear_cached("students")
+            return student
 
-    # Check if user is admin or the student themselves
-    if current_user.role != UserRole.ADMIN and current_user.id != student.user_id:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Not authorized to update this student",
-        )
+    # Only admins can update any student
+    student = await _get_authorized_student(
+        session,
+        current_user,
+        student_id,
+        _ADMIN_ONLY,
+        "Not authorized to update this student",
+    )
 
-    student_data = student_update.dict(exclude_unset=True)
     for field, value in student_data.items():
         setattr(student, field, value)
 
     session.add(student)
-    session.commit()
-    session.refresh(student)
+    await session.commit()
+    await clear_cached("students")
 
     return student
 
@@ -135,7 +248,7 @@ async def update_student(
 @router.delete("/{student_id}")
 async def delete_student(
     student_id: int,
-    session: Session = Depends(get_session),
+    session: AsyncSession = Depends(get_session),
     current_user: User = Depends(get_current_active_user),
 ):
     if current_user.role != UserRole.ADMIN:
@@ -144,42 +257,40 @@ async def delete_student(
             detail="Not authorized to delete students",
         )
 
-    student = session.exec(select(Student).where(Student.id == student_id)).first()
-    if not student:
+    # Delete by primary key without loading the row first
+    try:
+        result = await session.exec(delete(Student).where(Student.id == student_id))
+        if not result.rowcount:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND, detail="Student not found"
+            )
+        await session.commit()
+    except IntegrityError:
+        # The enrollments' foreign key keeps students who still have them
+        await session.rollback()
         raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND, detail="Student not found"
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Student has enrollments and cannot be deleted",
         )
-
-    session.delete(student)
-    session.commit()
+    await clear_cached("students")
 
     return {"message": "Student deleted successfully"}
 
 
 @router.get("/{student_id}/enrollments", response_model=List[EnrollmentRead])
 async def get_student_enrollments(
-    student_id: int,
-    session: Session = Depends(get_session),
-    current_user: User = Depends(get_current_active_user),
+    student: Row = Depends(
+        authorized_student("Not authorized to view student enrollments", narrow=True)
+    ),
+    session: AsyncSession = Depends(get_session),
 ):
-    student = session.exec(select(Student).where(Student.id == student_id)).first()
-    if not student:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND, detail="Student not found"
+    # Load each enrollment's student and course in the same statement
+    enrollments = (
+        await session.exec(
+            select(Enrollment)
+            .options(*read_options(Enrollment, EnrollmentRead))
+            .where(Enrollment.student_id == student.id)
         )
-
-    # Check if user is admin, instructor, or the student themselves
-    if (
-        current_user.role not in [UserRole.ADMIN, UserRole.INSTRUCTOR]
-        and current_user.id != student.user_id
-    ):
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Not authorized to view student enrollments",
-        )
-
-    enrollments = session.exec(
-        select(Enrollment).where(Enrollment.student_id == student_id)
     ).all()
 
-    return enrollments
+    return rows_response(enrollments, EnrollmentRead)
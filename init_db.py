@@ -8,12 +8,25 @@ from dotenv import load_dotenv
 load_dotenv()
 
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///university.db")
-engine = create_engine(DATABASE_URL, echo=True)
+engine = create_engine(
+    DATABASE_URL,
+    echo=True,
+    pool_size=20,
+    max_overflow=10,
+    pool_timeout=30,
+    pool_pre_ping=True,
+    pool_recycle=3600,
+)
 
 
 def create_sample_data():
     SQLModel.metadata.create_all(engine)
 
+    # bcrypt is deliberately slow; hash each shared fixture password once
+    admin_hash = get_password_hash("admin123")
+    instructor_hash = get_password_hash("instructor123")
+    student_hash = get_password_hash("student123")
+
     with Session(engine) as session:
         # Create admin user
         admin_user = User(
@@ -22,11 +35,8 @@ def create_sample_data():
             last_name="User",
             phone="+1234567890",
             role=UserRole.ADMIN,
-            hashed_password=get_password_hash("admin123"),
+            hashed_password=admin_hash,
         )
-        session.add(admin_user)
-        session.commit()
-        session.refresh(admin_user)
 
         # Create instructor users
         instructor1_user = User(
@@ -35,9 +45,8 @@ def create_sample_data():
             last_name="Smith",
             phone="+1234567891",
             role=UserRole.INSTRUCTOR,
-            hashed_password=get_password_hash("instructor123"),
+            hashed_password=instructor_hash,
         )
-        session.add(instructor1_user)
 
         instructor2_user = User(
             email="jane.doe@university.edu",
@@ -45,34 +54,8 @@ def create_sample_data():
             last_name="Doe",
             phone="+1234567892",
             role=UserRole.INSTRUCTOR,
-            hashed_password=get_password_hash("instructor123"),
-        )
-        session.add(instructor2_user)
-        session.commit()
-        session.refresh(instructor1_user)
-        session.refresh(instructor2_user)
-
-        # Create instructors
-        instructor1 = Instructor(
-            user_id=instructor1_user.id,
-            employee_id="EMP001",
-            department="Computer Science",
-            salary=75000.00,
-            office_location="CS Building Room 101",
+            hashed_password=instructor_hash,
         )
-        session.add(instructor1)
-
-        instructor2 = Instructor(
-            user_id=instructor2_user.id,
-            employee_id="EMP002",
-            department="Mathematics",
-            salary=70000.00,
-            office_location="Math Building Room 201",
-        )
-        session.add(instructor2)
-        session.commit()
-        session.refresh(instructor1)
-        session.refresh(instructor2)
 
         # Create student users
         student1_user = User(
@@ -81,9 +64,8 @@ def create_sample_data():
             last_name="Johnson",
             phone="+1234567893",
             role=UserRole.STUDENT,
-            hashed_password=get_password_hash("student123"),
+            hashed_password=student_hash,
         )
-        session.add(student1_user)
 
         student2_user = User(
             email="bob.wilson@student.university.edu",
@@ -91,9 +73,8 @@ def create_sample_data():
             last_name="Wilson",
             phone="+1234567894",
             role=UserRole.STUDENT,
-            hashed_password=get_password_hash("student123"),
+            hashed_password=student_hash,
         )
-        session.add(student2_user)
 
         student3_user = User(
             email="carol.brown@student.university.edu",
@@ -101,13 +82,37 @@ def create_sample_data():
             last_name="Brown",
             phone="+1234567895",
             role=UserRole.STUDENT,
-            hashed_password=get_password_hash("student123"),
+            hashed_password=student_hash,
+        )
+        # Insert each dependency tier in one flush to get its ids for the next
+        session.add_all(
+            [
+                admin_user,
+                instructor1_user,
+                instructor2_user,
+                student1_user,
+                student2_user,
+                student3_user,
+            ]
+        )
+        session.flush()
+
+        # Create instructors
+        instructor1 = Instructor(
+            user_id=instructor1_user.id,
+            employee_id="EMP001",
+            department="Computer Science",
+            salary=75000.00,
+            office_location="CS Building Room 101",
+        )
+
+        instructor2 = Instructor(
+            user_id=instructor2_user.id,
+            employee_id="EMP002",
+            department="Mathematics",
+            salary=70000.00,
+            office_location="Math Building Room 201",
         )
-        session.add(student3_user)
-        session.commit()
-        session.refresh(student1_user)
-        session.refresh(student2_user)
-        session.refresh(student3_user)
 
         # Create students
         student1 = Student(
@@ -118,7 +123,6 @@ def create_sample_data():
             address="123 University Ave, College Town",
             emergency_contact="+1234567896",
         )
-        session.add(student1)
 
         student2 = Student(
             user_id=student2_user.id,
@@ -128,7 +132,6 @@ def create_sample_data():
             address="456 Campus Dr, College Town",
             emergency_contact="+1234567897",
         )
-        session.add(student2)
 
         student3 = Student(
             user_id=student3_user.id,
@@ -138,11 +141,8 @@ def create_sample_data():
             address="789 Student St, College Town",
             emergency_contact="+1234567898",
         )
-        session.add(student3)
-        session.commit()
-        session.refresh(student1)
-        session.refresh(student2)
-        session.refresh(student3)
+        session.add_all([instructor1, instructor2, student1, student2, student3])
+        session.flush()
 
         # Create courses
         course1 = Course(
@@ -154,7 +154,6 @@ def create_sample_data():
             max_students=25,
             status=CourseStatusEnum.ACTIVE,
         )
-        session.add(course1)
 
         course2 = Course(
             course_code="CS201",
@@ -165,7 +164,6 @@ def create_sample_data():
             max_students=20,
             status=CourseStatusEnum.ACTIVE,
         )
-        session.add(course2)
 
         course3 = Course(
             course_code="MATH101",
@@ -176,7 +174,6 @@ def create_sample_data():
             max_students=30,
             status=CourseStatusEnum.ACTIVE,
         )
-        session.add(course3)
 
         course4 = Course(
             course_code="MATH201",
@@ -187,12 +184,8 @@ def create_sample_data():
             max_students=25,
             status=CourseStatusEnum.ACTIVE,
         )
-        session.add(course4)
-        session.commit()
-        session.refresh(course1)
-        session.refresh(course2)
-        session.refresh(course3)
-        session.refresh(course4)
+        session.add_all([course1, course2, course3, course4])
+        session.flush()
 
         # Create enrollments
         enrollment1 = Enrollment(
@@ -200,43 +193,47 @@ def create_sample_data():
             course_id=course1.id,
             status=EnrollmentStatusEnum.ENROLLED,
         )
-        session.add(enrollment1)
 
         enrollment2 = Enrollment(
             student_id=student1.id,
             course_id=course3.id,
             status=EnrollmentStatusEnum.ENROLLED,
         )
-        session.add(enrollment2)
 
         enrollment3 = Enrollment(
             student_id=student2.id,
             course_id=course1.id,
             status=EnrollmentStatusEnum.ENROLLED,
         )
-        session.add(enrollment3)
 
         enrollment4 = Enrollment(
             student_id=student2.id,
             course_id=course2.id,
             status=EnrollmentStatusEnum.ENROLLED,
         )
-        session.add(enrollment4)
 
         enrollment5 = Enrollment(
             student_id=student3.id,
             course_id=course3.id,
             status=EnrollmentStatusEnum.ENROLLED,
         )
-        session.add(enrollment5)
 
         enrollment6 = Enrollment(
             student_id=student3.id,
             course_id=course4.id,
             status=EnrollmentStatusEnum.ENROLLED,
         )
-        session.add(enrollment6)
 
+        session.add_all(
+            [
+                enrollment1,
+                enrollment2,
+                enrollment3,
+                enrollment4,
+                enrollment5,
+                enrollment6,
+            ]
+        )
         session.commit()
 
         print("Sample data created successfully!")
@@ -1,34 +1,54 @@
 from fastapi import FastAPI, Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from fastapi.middleware.cors import CORSMiddleware
-from sqlmodel import SQLModel, create_engine, Session
+from fastapi.responses import ORJSONResponse
+from sqlmodel import SQLModel, Session
 from contextlib import asynccontextmanager
+import logging
 import os
+import time
 from dotenv import load_dotenv
 
 from app.models import *
+from app import cache
 from app.routes import students, courses, instructors, enrollments, auth
-from app.database import get_session
+from app.database import engine, get_session
+from app.auth import BCRYPT_COST, get_password_hash
 
 load_dotenv()
 
-# Database setup
-DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///university.db")
-engine = create_engine(DATABASE_URL, echo=os.getenv("DEBUG", "false").lower() == "true")
+logger = logging.getLogger("uvicorn.error")
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Create tables on startup
-    SQLModel.metadata.create_all(engine)
+    async with engine.begin() as conn:
+        await conn.run_sync(SQLModel.metadata.create_all)
+
+    # Report the hashing cost so BCRYPT_COST can be tuned
+    started = time.perf_counter()
+    get_password_hash("startup-benchmark")
+    logger.info(
+        "bcrypt cost %d takes %.0f ms per hash",
+        BCRYPT_COST,
+        (time.perf_counter() - started) * 1000,
+    )
     yield
 
+    # Close pooled connections on shutdown
+    await engine.dispose()
+    if cache.redis is not None:
+        await cache.redis.aclose()
+
 
 app = FastAPI(
     title="University Management System",
     description="A comprehensive university management system built with FastAPI and SQLModel",
     version="1.0.0",
     lifespan=lifespan,
+    # orjson encodes datetimes, enums and UUIDs natively
+    default_response_class=ORJSONResponse,
     docs_url="/docs",
     redoc_url="/redoc",
 )